@@ -0,0 +1,70 @@
+"""
+Бенчмарк записи DOCX отчета: python-docx Document против DocxWriter.
+
+Отчет строится как в BookingReportRetieve: четыре абзаца на бронь. Время python-docx
+растет быстрее линейного, поэтому он замеряется на --docx-reserves бронях, а DocxWriter
+дополнительно на полном --reserves.
+
+    python benchmarks/docx_writer.py [--reserves 100000] [--docx-reserves 5000]
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from room_booking.docx_writer import DocxWriter  # noqa: E402
+
+
+def add_paragraphs(doc, reserves: int):
+    doc.add_heading('Отчет', 0)
+    doc.add_heading('room', level=1)
+    for reserve in range(reserves):
+        doc.add_heading(f'user_{reserve}', level=2)
+        doc.add_heading('2024-11-05 11:00:00+00:00', level=2)
+        doc.add_heading('2024-11-05 12:00:00+00:00', level=2)
+        doc.add_paragraph(f'description <{reserve}> & more')
+
+
+def render_python_docx(reserves: int, stream):
+    from docx import Document
+
+    doc = Document()
+    add_paragraphs(doc, reserves)
+    doc.save(stream)
+
+
+def render_docx_writer(reserves: int, stream):
+    with DocxWriter(stream) as doc:
+        add_paragraphs(doc, reserves)
+
+
+def measure(render, reserves: int):
+    stream = io.BytesIO()
+    started = time.perf_counter()
+    render(reserves, stream)
+    return time.perf_counter() - started, len(stream.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reserves', type=int, default=100000)
+    parser.add_argument('--docx-reserves', type=int, default=5000)
+    args = parser.parse_args()
+
+    docx_seconds, docx_size = measure(render_python_docx, args.docx_reserves)
+    writer_seconds, writer_size = measure(render_docx_writer, args.docx_reserves)
+    print(f'reserves: {args.docx_reserves}')
+    print(f'  python-docx: {docx_seconds:7.2f} s, {docx_size / 2 ** 20:.1f} MiB')
+    print(f'  DocxWriter:  {writer_seconds:7.2f} s, {writer_size / 2 ** 20:.1f} MiB')
+    print(f'  speedup:     x{docx_seconds / writer_seconds:.1f}')
+
+    writer_seconds, writer_size = measure(render_docx_writer, args.reserves)
+    print(f'reserves: {args.reserves}')
+    print(f'  DocxWriter:  {writer_seconds:7.2f} s, {writer_size / 2 ** 20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Бенчмарк параллельного рендеринга отчета по всем комнатам (room-report/?bundle=zip).
+
+Данные генерируются в памяти, БД не нужна. Для каждого количества процессов
+выводит время рендеринга и ускорение относительно одного процесса.
+
+    python benchmarks/reports.py [--rooms 500] [--reserves 20] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from room_booking import reports  # noqa: E402
+
+
+def make_rooms(rooms: int, reserves: int):
+    return [
+        (f'room_{room:04}', [(f'user_{reserve}', f'2024-11-05 {reserve % 24:02}:00:00+00:00',
+                              f'2024-11-05 {reserve % 24:02}:30:00+00:00', 'description ' * 5)
+                             for reserve in range(reserves)])
+        for room in range(rooms)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--reserves', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rooms = make_rooms(args.rooms, args.reserves)
+    print(f'rooms: {args.rooms}, reserves per room: {args.reserves}, cpu: {os.cpu_count()}')
+    baseline = None
+    for workers in args.workers:
+        if workers > 1:
+            reports.render_rooms_zip(rooms[:workers * 2], workers)  # запуск процессов пула
+        started = time.perf_counter()
+        reports.render_rooms_zip(rooms, workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f'workers {workers:>3}: {elapsed:7.2f} s, speedup x{baseline / elapsed:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Бенчмарк старта воркера.
+
+Каждый замер запускается в отдельном процессе: загрузка WSGI приложения
+и URLconf, как при старте воркера gunicorn/uwsgi. Выводит время старта,
+пиковую память и список тяжелых модулей, загруженных при старте.
+
+    python benchmarks/startup.py [--runs 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ('docx', 'lxml.etree', 'drf_yasg.generators', 'drf_yasg.renderers', 'drf_yasg.codecs')
+
+WORKER_BOOT = f"""
+import json, os, resource, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dit_test_case.settings')
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'seconds': elapsed,
+    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def boot_worker() -> dict:
+    output = subprocess.run([sys.executable, '-c', WORKER_BOOT], cwd=BASE_DIR, env=os.environ.copy(),
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    boot_worker()  # прогрев кеша байткода
+    results = [boot_worker() for _ in range(args.runs)]
+    seconds = [result['seconds'] for result in results]
+    maxrss = [result['maxrss_kb'] for result in results]
+
+    print(f'runs:           {args.runs}')
+    print(f'boot time, ms:  median {statistics.median(seconds) * 1000:.1f}, min {min(seconds) * 1000:.1f}')
+    print(f'max RSS, MiB:   median {statistics.median(maxrss) / 1024:.1f}')
+    print(f'heavy modules:  {", ".join(results[0]["heavy"]) or "none"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Статическая OpenAPI схема.
+
+Схема генерируется один раз командой ``python manage.py build_schema`` и отдается
+из файла. Если файла нет, схема генерируется при первом запросе и хранится в памяти
+процесса. drf_yasg генераторы и рендереры импортируются только при генерации.
+"""
+import functools
+
+from django.conf import settings
+from django.http import HttpResponse
+from drf_yasg import openapi
+
+API_INFO = openapi.Info(
+    title='REST API',
+    default_version='v1',
+)
+
+SCHEMA_FORMATS = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+
+def get_schema_path(schema_format: str):
+    return settings.SWAGGER_SCHEMA_DIR / f'swagger.{schema_format}'
+
+
+def render_schema(schema_format: str) -> bytes:
+    """ Генерация схемы по всем view проекта """
+    from drf_yasg.app_settings import swagger_settings
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(info=API_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    if schema_format == 'yaml':
+        return OpenAPICodecYaml(validators=[]).encode(schema)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema(schema_format: str) -> bytes:
+    """ Схема из файла, собранного build_schema, либо сгенерированная при первом обращении """
+    try:
+        return get_schema_path(schema_format).read_bytes()
+    except FileNotFoundError:
+        return render_schema(schema_format)
+
+
+def schema_view(request, format):
+    schema_format = format.lstrip('.')
+    return HttpResponse(get_schema(schema_format), content_type=SCHEMA_FORMATS[schema_format])
+
+
+@functools.lru_cache(maxsize=None)
+def _get_swagger_ui_view():
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    schema_ui = get_schema_view(API_INFO, public=True, permission_classes=(permissions.AllowAny,))
+    return schema_ui.with_ui('swagger', cache_timeout=0)
+
+
+def swagger_ui_view(request, *args, **kwargs):
+    # Страница UI не содержит схему: swagger-ui загружает ее по SPEC_URL
+    return _get_swagger_ui_view()(request, *args, **kwargs)
@@ -86,6 +86,33 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'dit_test_case.schema.API_INFO',
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+# Каталог со статической схемой, собирается командой build_schema
+SWAGGER_SCHEMA_DIR = BASE_DIR / 'schema'
+
+# Количество процессов для параллельного рендеринга отчетов (room-report/?bundle=zip).
+# Пул создается в каждом веб-воркере и живет вместе с ним: при N воркерах запускается
+# N * REPORT_WORKERS процессов. По умолчанию 1 - рендеринг в процессе воркера без пула
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 1))
+
+# Idempotency-Key для POST room-booking/: время хранения ответа, блокировки
+# выполняющегося запроса и ожидания ее снятия повторным запросом, в секундах
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+# Порядка времени выполнения бронирования: дольше повтор занимает воркер, затем 409 с Retry-After
+IDEMPOTENCY_WAIT_TIMEOUT = 2
+
+# Время жизни временной брони (room-hold/) в секундах и размер пачки для команды expire_holds
+HOLD_TTL = int(os.environ.get('HOLD_TTL', 10 * 60))
+HOLD_EXPIRE_BATCH_SIZE = 1000
+
+# Время жизни кеша расписания комнаты (room/<name>/schedule/) в секундах
+ROOM_SCHEDULE_CACHE_TIMEOUT = 30
+
 WSGI_APPLICATION = 'dit_test_case.wsgi.application'
 
 # Database
@@ -99,6 +126,16 @@ DATABASES = {
 }
 
 
+# Кеш должен быть общим для всех воркеров (например, django.core.cache.backends.redis.RedisCache),
+# в нем хранятся ответы по Idempotency-Key
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -16,24 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, re_path, include
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
 
-SchemaView = get_schema_view(
-    openapi.Info(
-        title='REST API',
-        default_version='v1',
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from dit_test_case import schema
 
 urlpatterns = [
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', SchemaView.without_ui(cache_timeout=0),
-            name='schema-json'),
-    re_path(r'^swagger/$', SchemaView.with_ui('swagger', cache_timeout=0),
-            name='schema-swagger-ui'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema.schema_view, name='schema-json'),
+    re_path(r'^swagger/$', schema.swagger_ui_view, name='schema-swagger-ui'),
     path('api/', include('room_booking.urls')),
     path('admin/', admin.site.urls),
 ]
@@ -0,0 +1,153 @@
+"""
+Быстрая запись DOCX отчетов.
+
+Вместо построения lxml дерева python-docx тело word/document.xml собирается из готовых
+XML фрагментов с экранированным текстом и пишется потоком прямо в zip. Остальные части
+пакета (стили, тема, настройки) берутся из шаблона resources/report_template.docx,
+прочитанного один раз на процесс.
+"""
+import functools
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DOCUMENT_PART = 'word/document.xml'
+
+TEMPLATE_PATH = Path(__file__).resolve().parent / 'resources' / 'report_template.docx'
+
+# Количество фрагментов, кодируемых и записываемых в zip за раз
+_WRITE_BATCH_SIZE = 1000
+
+_RUN_START = '<w:r><w:t xml:space="preserve">'
+_RUN_END = '</w:t></w:r>'
+
+# Символы, недопустимые в XML 1.0: управляющие, кроме табуляции и переводов строки,
+# суррогаты и U+FFFE, U+FFFF
+_INVALID_XML_CHARS = (
+    *(code for code in range(0x20) if code not in (0x09, 0x0A, 0x0D)),
+    *range(0xD800, 0xE000),
+    0xFFFE,
+    0xFFFF,
+)
+
+# Экранирование, переносы и табуляция как в python-docx, недопустимые в XML символы удаляются
+_TEXT_TRANSLATION = {
+    **dict.fromkeys(_INVALID_XML_CHARS),
+    ord('&'): '&amp;',
+    ord('<'): '&lt;',
+    ord('>'): '&gt;',
+    ord('\t'): '</w:t><w:tab/><w:t xml:space="preserve">',
+    ord('\n'): '</w:t><w:br/><w:t xml:space="preserve">',
+    ord('\r'): '</w:t><w:br/><w:t xml:space="preserve">',
+}
+
+_HEADING_STYLES = {0: 'Title', **{level: f'Heading{level}' for level in range(1, 10)}}
+_PARAGRAPH_STARTS = {
+    level: f'<w:p><w:pPr><w:pStyle w:val="{style}"/></w:pPr>' for level, style in _HEADING_STYLES.items()}
+
+# (уровень заголовка или None для обычного абзаца, текст)
+Paragraph = Tuple[Optional[int], object]
+
+
+@functools.lru_cache(maxsize=None)
+def get_package_template() -> Tuple[Dict[str, bytes], bytes, bytes]:
+    """ Шаблон пакета: части кроме document.xml, начало document.xml до тела и его окончание """
+    with zipfile.ZipFile(TEMPLATE_PATH) as template:
+        parts = {info.filename: template.read(info) for info in template.infolist()}
+
+    document_xml = parts.pop(DOCUMENT_PART)
+    body_end = document_xml.index(b'<w:sectPr')
+    return parts, document_xml[:body_end], document_xml[body_end:]
+
+
+def _paragraph(start: str, text) -> str:
+    text = str(text)
+    if not text:
+        return f'{start}</w:p>'
+    return f'{start}{_RUN_START}{text.translate(_TEXT_TRANSLATION)}{_RUN_END}</w:p>'
+
+
+class DocxWriter:
+    """ Запись DOCX в файлоподобный объект по мере добавления абзацев.
+
+    Поток может быть несеекабельным. Документ завершается в close() или при выходе
+    из with:
+
+        with DocxWriter(stream) as doc:
+            doc.add_heading('Отчет', 0)
+            doc.add_paragraph('...')
+    """
+
+    def __init__(self, stream):
+        parts, document_start, self._document_end = get_package_template()
+        self._archive = zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        for name, data in parts.items():
+            self._archive.writestr(name, data)
+        self._document = self._archive.open(DOCUMENT_PART, 'w')
+        self._document.write(document_start)
+        self._batch = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_heading(self, text='', level: int = 1):
+        if level not in _PARAGRAPH_STARTS:
+            raise ValueError(f'level must be in range 0-9, got {level}')
+        self._write(_paragraph(_PARAGRAPH_STARTS[level], text))
+
+    def add_paragraph(self, text=''):
+        self._write(_paragraph('<w:p>', text))
+
+    def _write(self, fragment: str):
+        self._batch.append(fragment)
+        if len(self._batch) >= _WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """ Запись накопленных абзацев в zip """
+        if self._batch:
+            self._document.write(''.join(self._batch).encode())
+            self._batch.clear()
+
+    def close(self):
+        self.flush()
+        self._document.write(self._document_end)
+        self._document.close()
+        self._archive.close()
+
+
+class _ChunkStream:
+    """ Несеекабельный поток, накапливающий записанные байты до выдачи """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_docx(paragraphs: Iterable[Paragraph]) -> Iterator[bytes]:
+    """ DOCX частями по мере записи, для StreamingHttpResponse """
+    stream = _ChunkStream()
+    with DocxWriter(stream) as doc:
+        for level, text in paragraphs:
+            if level is None:
+                doc.add_paragraph(text)
+            else:
+                doc.add_heading(text, level)
+            chunk = stream.pop()
+            if chunk:
+                yield chunk
+    yield stream.pop()
@@ -0,0 +1,106 @@
+"""
+Поддержка заголовка Idempotency-Key для POST запросов.
+
+Успешный ответ сохраняется в кеше под ключом пользователя и Idempotency-Key и
+возвращается повторным запросам без выполнения view. Пока первый запрос
+выполняется, одинаковые запросы ждут его результата; если он завершился ошибкой,
+один из ожидающих запросов выполняет view заново.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from drf_yasg.openapi import IN_HEADER, TYPE_STRING, Parameter
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+IDEMPOTENCY_PARAMETERS = [
+    Parameter(IDEMPOTENCY_HEADER, IN_HEADER, 'Repeated requests with the same key return the first response',
+              type=TYPE_STRING, required=False)]
+
+# Интервал проверки результата запроса, выполняющегося в другом процессе: растет
+# от начального до максимального, чтобы ожидающие повторы не нагружали кеш
+_POLL_INTERVAL = 0.02
+_MAX_POLL_INTERVAL = 0.2
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Request with this Idempotency-Key is still in progress.'
+    default_code = 'idempotency_key_in_progress'
+    # Отдается в заголовке Retry-After обработчиком исключений DRF
+    wait = 1
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Idempotency-Key was already used with a different request body.'
+    default_code = 'idempotency_key_mismatch'
+
+
+def _get_fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path} {body}'.encode()).hexdigest()
+
+
+def get_response_key(user_id: int, key: str) -> str:
+    """ Ключ кеша ответа. Заголовок хешируется: он может быть длинным и содержать пробелы """
+    return f'idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _replay(stored: dict, fingerprint: str) -> Response:
+    if stored['fingerprint'] != fingerprint:
+        raise IdempotencyKeyMismatch()
+    return Response(stored['data'], status=stored['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method):
+    """ Декоратор метода APIView: повтор запроса с тем же Idempotency-Key возвращает сохраненный ответ """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise ValidationError({'detail': f'{IDEMPOTENCY_HEADER} must be at most '
+                                             f'{IDEMPOTENCY_KEY_MAX_LENGTH} characters.'})
+
+        response_key = get_response_key(request.user.pk, key)
+        lock_key = f'{response_key}:lock'
+        fingerprint = _get_fingerprint(request)
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        poll_interval = _POLL_INTERVAL
+        while True:
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            if cache.add(lock_key, fingerprint, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                try:
+                    # Ответ мог быть сохранен между проверкой и захватом блокировки
+                    stored = cache.get(response_key)
+                    if stored is None:
+                        response = view_method(self, request, *args, **kwargs)
+                        if status.is_success(response.status_code):
+                            cache.set(response_key, {'fingerprint': fingerprint, 'status': response.status_code,
+                                                     'data': response.data}, settings.IDEMPOTENCY_KEY_TTL)
+                        return response
+                finally:
+                    cache.delete(lock_key)
+                return _replay(stored, fingerprint)
+            # Запрос с тем же ключом выполняется: ждем его ответ. Если он завершится без
+            # сохраненного ответа, блокировка освободится и запрос выполнится заново
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgress()
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, _MAX_POLL_INTERVAL)
+
+    return wrapper
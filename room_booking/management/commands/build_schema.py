@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dit_test_case import schema
+
+
+class Command(BaseCommand):
+    help = 'Сборка статической OpenAPI схемы для /swagger.json и /swagger.yaml'
+
+    def handle(self, *args, **options):
+        settings.SWAGGER_SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+        for schema_format in schema.SCHEMA_FORMATS:
+            path = schema.get_schema_path(schema_format)
+            path.write_bytes(schema.render_schema(schema_format))
+            self.stdout.write(self.style.SUCCESS(f'Schema written to {path}'))
+        schema.get_schema.cache_clear()
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from room_booking import models
+
+
+class Command(BaseCommand):
+    help = 'Удаление истекших временных броней пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.HOLD_EXPIRE_BATCH_SIZE,
+                            help='Количество временных броней, удаляемых одним запросом')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Повторять очистку каждые N секунд. По умолчанию одна очистка')
+
+    def handle(self, *args, batch_size, interval, **options):
+        while True:
+            # Соединение с БД в долгоживущем процессе может закрыться или устареть
+            close_old_connections()
+            deleted = expire_holds(batch_size)
+            self.stdout.write(f'Expired holds deleted: {deleted}')
+            if not interval:
+                break
+            time.sleep(interval)
+
+
+def expire_holds(batch_size: int) -> int:
+    """ Удаление истекших временных броней. Один DELETE на пачку из batch_size строк """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(models.Hold.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += models.Hold.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return deleted
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 15:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room_booking', '0002_alter_room_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserve',
+            index=models.Index(fields=['room', 'start_time', 'end_time'], name='reserve_room_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserve',
+            index=models.Index(fields=['-start_time', '-id'], name='reserve_start_time_id_idx'),
+        ),
+    ]
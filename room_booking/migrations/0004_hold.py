@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-19 15:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room_booking', '0003_reserve_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(verbose_name='Время начала')),
+                ('end_time', models.DateTimeField(verbose_name='Время окончания')),
+                ('expires_at', models.DateTimeField(verbose_name='Действует до')),
+                ('held_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_holds', to=settings.AUTH_USER_MODEL, verbose_name='Удерживающий')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_holds', to='room_booking.room', verbose_name='Удерживаемая комната')),
+            ],
+            options={
+                'verbose_name': 'Временная бронь',
+                'verbose_name_plural': 'Временные брони',
+                'indexes': [models.Index(fields=['room', 'start_time', 'end_time'], name='hold_room_time_idx'), models.Index(fields=['expires_at'], name='hold_expires_at_idx')],
+            },
+        ),
+    ]
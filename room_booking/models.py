@@ -32,3 +32,29 @@ class Reserve(models.Model):
     class Meta:
         verbose_name = 'Бронь'
         verbose_name_plural = 'Бронирования'
+        indexes = (
+            models.Index(fields=('room', 'start_time', 'end_time'), name='reserve_room_time_idx'),
+            models.Index(fields=('-start_time', '-id'), name='reserve_start_time_id_idx'),
+        )
+
+
+class Hold(models.Model):
+    """ Временная бронь комнаты на время заполнения заявки """
+    room = models.ForeignKey(Room, null=False, blank=False, on_delete=models.CASCADE,
+                             related_name='room_holds', verbose_name='Удерживаемая комната')
+
+    held_by = models.ForeignKey(User, null=False, blank=False, on_delete=models.CASCADE,
+                                related_name='user_holds', verbose_name='Удерживающий')
+
+    start_time = models.DateTimeField(null=False, blank=False, verbose_name='Время начала')
+    end_time = models.DateTimeField(null=False, blank=False, verbose_name='Время окончания')
+
+    expires_at = models.DateTimeField(null=False, blank=False, verbose_name='Действует до')
+
+    class Meta:
+        verbose_name = 'Временная бронь'
+        verbose_name_plural = 'Временные брони'
+        indexes = (
+            models.Index(fields=('room', 'start_time', 'end_time'), name='hold_room_time_idx'),
+            models.Index(fields=('expires_at',), name='hold_expires_at_idx'),
+        )
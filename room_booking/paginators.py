@@ -0,0 +1,32 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CappedCount(int):
+    """ Количество строк, ограниченное сверху. Выводится как «10000+» """
+
+    def __str__(self):
+        return f'{int(self)}+'
+
+
+class CappedCountPaginator(Paginator):
+    """ Пагинатор, не считающий COUNT(*) по всей таблице.
+
+    Количество строк считается по подзапросу с LIMIT, поэтому на больших таблицах
+    запрос не растет вместе с объемом данных. Если строк больше COUNT_LIMIT,
+    возвращается CappedCount(COUNT_LIMIT).
+    """
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self) -> int:
+        return get_capped_count(self.object_list, self.COUNT_LIMIT)
+
+
+def get_capped_count(object_list, limit: int = None) -> int:
+    limit = limit or CappedCountPaginator.COUNT_LIMIT
+    if hasattr(object_list, 'query'):
+        count = object_list[:limit + 1].count()
+    else:
+        count = len(object_list)
+    return CappedCount(limit) if count > limit else count
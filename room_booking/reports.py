@@ -0,0 +1,133 @@
+"""
+Рендеринг DOCX отчетов по бронированиям.
+
+Модуль не обращается к БД и моделям: данные подготавливаются во view и передаются
+простыми кортежами, поэтому функции рендеринга можно выполнять в отдельных процессах.
+"""
+import io
+import multiprocessing
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+from room_booking.docx_writer import Paragraph, iter_docx
+
+# (reserved_by, start_time, end_time, description)
+ReserveRow = Tuple[str, str, str, str]
+RoomRows = Tuple[str, Sequence[ReserveRow]]
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+ZIP_CONTENT_TYPE = 'application/zip'
+
+# Фиксированная дата файлов в архиве, чтобы одинаковые отчеты совпадали побайтно
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Все, кроме букв, цифр, пробела, '-' и '.', заменяется в именах файлов архива
+_UNSAFE_NAME_CHARS = re.compile(r'[^\w\-. ]')
+
+
+def iter_room_section(room_name: str, reserves: Iterable[ReserveRow]) -> Iterator[Paragraph]:
+    """ Раздел отчета по одной комнате """
+    yield 1, room_name
+    for reserved_by, start_time, end_time, description in reserves:
+        yield 2, f'reserved_by: {reserved_by}'
+        yield 2, f'{start_time} - {end_time}'
+        yield None, f'desciption: {description}'
+
+
+def iter_rooms_report(rooms: Iterable[RoomRows]) -> Iterator[Paragraph]:
+    """ Абзацы отчета со всеми комнатами """
+    yield 0, 'Отчет'
+    for room_name, reserves in rooms:
+        yield from iter_room_section(room_name, reserves)
+
+
+def render_room_report(room_name: str, reserves: Sequence[ReserveRow]) -> bytes:
+    """ DOCX по одной комнате """
+    return b''.join(iter_docx(iter_rooms_report([(room_name, reserves)])))
+
+
+# Пулы процессов по количеству воркеров. Создаются и заменяются под _executors_lock:
+# при многопоточном сервере иначе параллельные запросы запустят лишние пулы
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """ Пул процессов, общий для всех запросов воркера.
+
+    Используется spawn: форк процесса с открытыми соединениями к БД и потоками
+    сервера небезопасен.
+    """
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _executors[workers] = executor
+        return executor
+
+
+def _replace_executor(workers: int, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """ Замена сломанного пула. Пул мог уже заменить другой поток, тогда используется его пул """
+    with _executors_lock:
+        if _executors.get(workers) is broken:
+            del _executors[workers]
+    broken.shutdown(wait=False, cancel_futures=True)
+    return get_executor(workers)
+
+
+def _render_in_pool(names: List[str], reserves: List[Sequence[ReserveRow]], workers: int) -> List[bytes]:
+    chunksize = max(1, len(names) // (workers * 4))
+    executor = get_executor(workers)
+    try:
+        return list(executor.map(render_room_report, names, reserves, chunksize=chunksize))
+    except BrokenProcessPool:
+        # Процесс пула умер (OOM, kill): сломанный пул заменяется новым, отчет рендерится заново
+        executor = _replace_executor(workers, executor)
+        return list(executor.map(render_room_report, names, reserves, chunksize=chunksize))
+
+
+def get_entry_name(room_name: str, used_names: Set[str]) -> str:
+    """ Имя файла комнаты в архиве: без разделителей пути, '..' и служебных символов, уникальное """
+    name = _UNSAFE_NAME_CHARS.sub('_', room_name).replace('..', '_').strip(' .') or 'room'
+    entry_name = f'report_{name}.docx'
+    suffix = 1
+    while entry_name in used_names:
+        suffix += 1
+        entry_name = f'report_{name}_{suffix}.docx'
+    used_names.add(entry_name)
+    return entry_name
+
+
+def render_rooms_zip(rooms: Sequence[RoomRows], workers: int) -> bytes:
+    """ Zip архив с DOCX отчетом по каждой комнате.
+
+    Комнаты рендерятся в пуле из workers процессов, файлы в архиве идут в порядке rooms.
+    """
+    names = [room_name for room_name, _ in rooms]
+    reserves = [room_reserves for _, room_reserves in rooms]
+    if workers > 1 and len(rooms) > 1:
+        documents = _render_in_pool(names, reserves, workers)
+    else:
+        documents = map(render_room_report, names, reserves)
+
+    stream = io.BytesIO()
+    used_names = set()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for room_name, document in zip(names, documents):
+            info = zipfile.ZipInfo(get_entry_name(room_name, used_names), date_time=_ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, document)
+    return stream.getvalue()
+
+
+def get_room_rows(rooms) -> List[RoomRows]:
+    """ Данные комнат с prefetch room_reserves в виде, пригодном для передачи в процессы """
+    return [
+        (room.name, [(str(reserve.reserved_by), str(reserve.start_time), str(reserve.end_time), reserve.description)
+                     for reserve in room.room_reserves.all()])
+        for room in rooms
+    ]
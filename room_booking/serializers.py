@@ -18,18 +18,43 @@ class CreateReserveSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """ Валидация по времени бронирования """
-        start_time = data['start_time']
-        end_time = data['end_time']
-        room = utils.get_object_by_name(data['room'], key='Room')
-        data['room'] = room
-        if end_time < start_time:
-            raise ValidationError('end_time must be bigger than start_time')
-        if start_time < dt.datetime.now(tz=pytz.UTC):
+        return _validate_reserve_time(data)
+
+
+class CreateHoldSerializer(serializers.ModelSerializer):
+    """ Сериализация временной брони комнаты """
+    room = serializers.CharField(required=True, max_length=256)
+
+    class Meta:
+        model = models.Hold
+        fields = ('id', 'room', 'start_time', 'end_time', 'expires_at')
+        read_only_fields = ('expires_at',)
+
+    def validate(self, data):
+        """ Валидация по времени бронирования """
+        return _validate_reserve_time(data)
+
+
+class ConfirmHoldSerializer(serializers.Serializer):
+    """ Подтверждение временной брони. Временная бронь передается в context['hold'] """
+    description = serializers.CharField(required=True, max_length=512)
+
+    def validate(self, data):
+        hold = self.context['hold']
+        if hold.start_time < dt.datetime.now(tz=pytz.UTC):
             raise ValidationError('You cannot reserve room for past time')
-        if _get_room_status(room, start_time, end_time):
+        if _get_room_status(hold.room, hold.start_time, hold.end_time, exclude_hold=hold):
             raise ValidationError('Room already reserved on this time')
         return data
 
+    def create(self, validated_data):
+        """ Бронь создается вместо временной брони """
+        hold = self.context['hold']
+        reserve = models.Reserve.objects.create(room=hold.room, reserved_by=hold.held_by, start_time=hold.start_time,
+                                                end_time=hold.end_time, description=validated_data['description'])
+        hold.delete()
+        return reserve
+
 
 class ReservesSerializer(serializers.ModelSerializer):
     """ Сериализация брони комнаты """
@@ -51,8 +76,9 @@ class RoomSerializer(serializers.ModelSerializer):
 
     def get_is_free(self, instance: models.Room) -> bool:
         """ Статус комнаты в текущий момент. Свободна или нет """
+        now = dt.datetime.now(tz=pytz.UTC)
         return not models.Reserve.objects.filter(
-            Q(room=instance) & Q(start_time__lte=dt.datetime.now()) & Q(end_time__gte=dt.datetime.now())).exists()
+            Q(room=instance) & Q(start_time__lte=now) & Q(end_time__gte=now)).exists()
 
     def get_room_reserves(self, instance: models.Room):
         start_date = self.context.get('start_date')
@@ -65,12 +91,33 @@ class RoomSerializer(serializers.ModelSerializer):
         return ReservesSerializer(reserves, many=True, read_only=True).data
 
 
-def _get_room_status(obj: models.Room, first_date: dt.datetime, second_date: dt.datetime) -> bool:
+def _validate_reserve_time(data):
+    start_time = data['start_time']
+    end_time = data['end_time']
+    room = utils.get_object_by_name(data['room'], key='Room')
+    data['room'] = room
+    if end_time < start_time:
+        raise ValidationError('end_time must be bigger than start_time')
+    if start_time < dt.datetime.now(tz=pytz.UTC):
+        raise ValidationError('You cannot reserve room for past time')
+    if _get_room_status(room, start_time, end_time):
+        raise ValidationError('Room already reserved on this time')
+    return data
+
+
+def _get_room_status(obj: models.Room, first_date: dt.datetime, second_date: dt.datetime,
+                     exclude_hold: models.Hold = None) -> bool:
     intersection_by_start_date = Q(start_time__gt=first_date) & Q(end_time__lt=first_date)
     intersection_by_end_date = Q(start_time__gt=second_date) & Q(end_time__lt=second_date)
     external_intersection = Q(start_time__lte=first_date) & Q(end_time__gte=second_date)
     internal_intersection = Q(start_time__gte=first_date) & Q(end_time__lte=second_date)
-
-    return models.Reserve.objects.filter(
-        Q(room=obj) & (
-                intersection_by_start_date | intersection_by_end_date | external_intersection | internal_intersection)).exists()
+    intersection = Q(room=obj) & (
+            intersection_by_start_date | intersection_by_end_date | external_intersection | internal_intersection)
+
+    if models.Reserve.objects.filter(intersection).exists():
+        return True
+    # Действующие временные брони тоже занимают комнату
+    holds = models.Hold.objects.filter(intersection & Q(expires_at__gt=dt.datetime.now(tz=pytz.UTC)))
+    if exclude_hold is not None:
+        holds = holds.exclude(pk=exclude_hold.pk)
+    return holds.exists()
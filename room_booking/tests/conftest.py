@@ -1,5 +1,6 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 User = get_user_model()
@@ -12,3 +13,8 @@ def user():
     """ объект user """
     return User.objects.create_user(username='testuser', password='testpassword')
 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """ Кеш LocMemCache общий для всех тестов процесса """
+    cache.clear()
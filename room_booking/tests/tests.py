@@ -1,16 +1,30 @@
 import datetime as dt
+import io
+import os
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
 from unittest.mock import ANY
 
+import docx
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.db.models import Q
 
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from pytz import UTC
 from rest_framework.test import APIClient
 
+from dit_test_case import schema
 from room_booking.tests import utils
-from room_booking import models
+from room_booking.docx_writer import DocxWriter
+from room_booking import utils as room_utils
+from room_booking import idempotency, models, paginators, reports
 
 pytestmark = pytest.mark.django_db(['default'])
 
@@ -67,6 +81,59 @@ def test_get_room_schedule_with_filter_parameter(user):
     assert len(response_json['room_reserves']) == 1
 
 
+def test_get_room_schedule_default_window_matches_explicit(user, settings, django_assert_num_queries):
+    """ Запрос без фильтров и с явными границами текущих суток берут расписание из одного кеша """
+    settings.ROOM_SCHEDULE_CACHE_TIMEOUT = 10 ** 9  # оба запроса попадают в один интервал
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    endpoint = reverse('room-schedule', kwargs={'room_name': room.name})
+    today = timezone.localdate().isoformat()
+
+    default = api_client.get(endpoint)
+    with django_assert_num_queries(2):  # пользователь и комната
+        explicit = api_client.get(endpoint, data={'start_date': f'{today}T00:00:00+00:00',
+                                                  'end_date': f'{today} 23:59:59Z'})
+
+    assert default.json() == explicit.json()
+
+
+def test_room_schedule_cache_invalidated_on_booking(user):
+    """ Бронирование сбрасывает кеш расписания комнаты """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    request_data = _get_future_reserve_data(room)
+    endpoint = reverse('room-schedule', kwargs={'room_name': room.name})
+    data = {'start_date': request_data['start_time'], 'end_date': request_data['end_time']}
+
+    assert api_client.get(endpoint, data=data).json()['room_reserves'] == []
+    assert api_client.post(reverse('room-booking'), data=request_data).status_code == 201
+    assert len(api_client.get(endpoint, data=data).json()['room_reserves']) == 1
+
+
+def test_room_schedule_version_not_reused_after_eviction(user):
+    """ После вытеснения версии из кеша расписание не берется из записи до бронирования """
+    room = _create_room_with_reserves()
+    start_date, end_date = dt.datetime(2024, 11, 5, tzinfo=UTC), dt.datetime(2024, 11, 6, tzinfo=UTC)
+    cache_key = room_utils.get_room_schedule_cache_key(room, start_date, end_date)
+    room_utils.invalidate_room_schedule(room.pk)
+    cache.delete(f'room-schedule-version:{room.pk}')
+
+    assert room_utils.get_room_schedule_cache_key(room, start_date, end_date) != cache_key
+
+
+def test_get_room_schedule_with_invalid_date(user):
+    """ 400 статус при некорректной дате в фильтре """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    endpoint = reverse('room-schedule', kwargs={'room_name': room.name})
+    response = api_client.get(endpoint, data={'start_date': 'yesterday'})
+
+    assert response.status_code == 400
+
+
 def test_create_reserve(user):
     """ Бронирование комнаты """
     token = _get_token(user)
@@ -95,6 +162,85 @@ def test_create_reserve(user):
     ))
 
 
+def test_create_reserve_with_idempotency_key(user):
+    """ Повтор бронирования с тем же Idempotency-Key возвращает первый ответ без новой брони """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    request_data = _get_future_reserve_data(room)
+
+    first = api_client.post(reverse('room-booking'), data=request_data, HTTP_IDEMPOTENCY_KEY='key')
+    second = api_client.post(reverse('room-booking'), data=request_data, HTTP_IDEMPOTENCY_KEY='key')
+
+    assert first.status_code == second.status_code == 201
+    assert first.json() == second.json()
+    assert second['Idempotent-Replayed'] == 'true'
+    assert models.Reserve.objects.filter(description='idempotent').count() == 1
+
+
+def test_idempotency_key_with_spaces(user, recwarn):
+    """ Длинный ключ с пробелами не попадает в ключ кеша как есть """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    request_data = _get_future_reserve_data(room)
+    key = 'a b ' + 'x' * 240
+
+    first = api_client.post(reverse('room-booking'), data=request_data, HTTP_IDEMPOTENCY_KEY=key)
+    second = api_client.post(reverse('room-booking'), data=request_data, HTTP_IDEMPOTENCY_KEY=key)
+
+    assert first.status_code == second.status_code == 201
+    assert second['Idempotent-Replayed'] == 'true'
+    assert not [warning for warning in recwarn if 'memcached' in str(warning.message)]
+
+
+def test_idempotency_key_reused_with_other_body(user):
+    """ 422 при повторном использовании Idempotency-Key с другим телом запроса """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    request_data = _get_future_reserve_data(room)
+
+    api_client.post(reverse('room-booking'), data=request_data, HTTP_IDEMPOTENCY_KEY='key')
+    request_data['description'] = 'other'
+    response = api_client.post(reverse('room-booking'), data=request_data, HTTP_IDEMPOTENCY_KEY='key')
+
+    assert response.status_code == 422
+
+
+def test_idempotency_key_original_failed(user, monkeypatch):
+    """ Если первый запрос завершился без ответа, ожидающий повтор выполняет бронирование """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    lock_key = f"{idempotency.get_response_key(user.pk, 'key')}:lock"
+    cache.add(lock_key, 'fingerprint')
+    # Первый запрос падает во время ожидания повтора: блокировка снимается, ответ не сохранен
+    monkeypatch.setattr(idempotency.time, 'sleep', lambda seconds: cache.delete(lock_key))
+
+    response = api_client.post(reverse('room-booking'), data=_get_future_reserve_data(room),
+                               HTTP_IDEMPOTENCY_KEY='key')
+
+    assert response.status_code == 201
+    assert models.Reserve.objects.filter(description='idempotent').count() == 1
+
+
+def test_idempotency_key_in_progress(user, settings):
+    """ 409 если запрос с тем же Idempotency-Key выполняется дольше времени ожидания """
+    settings.IDEMPOTENCY_WAIT_TIMEOUT = 0
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    cache.add(f"{idempotency.get_response_key(user.pk, 'key')}:lock", 'fingerprint')
+
+    response = api_client.post(reverse('room-booking'), data=_get_future_reserve_data(room),
+                               HTTP_IDEMPOTENCY_KEY='key')
+
+    assert response.status_code == 409
+    assert response['Retry-After'] == '1'
+    assert not models.Reserve.objects.filter(description='idempotent').exists()
+
+
 @pytest.mark.parametrize('start_time, end_time', [('2024-09-13 10:00:00Z', '2024-05-13 09:00:00Z'),
                                                   ('2022-09-13 10:00:00Z', '2022-09-13 11:00:00Z')])
 def test_validate_by_dates(user, start_time, end_time):
@@ -128,6 +274,67 @@ def test_get_400_on_occupied_room_reserve(user):
     assert response.status_code == 400
 
 
+def test_hold_blocks_reserve_and_confirms(user):
+    """ Временная бронь занимает комнату и подтверждается в бронь """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    request_data = _get_future_reserve_data(room)
+
+    response = api_client.post(reverse('room-hold'), data=request_data)
+    assert response.status_code == 201
+    hold_id = response.json()['id']
+
+    response = api_client.post(reverse('room-booking'), data=request_data)
+    assert response.status_code == 400
+
+    response = api_client.post(reverse('room-hold-confirm', kwargs={'pk': hold_id}),
+                               data={'description': 'confirmed'})
+    assert response.status_code == 201
+    reserve = models.Reserve.objects.get(pk=response.json()['id'])
+    assert reserve.description == 'confirmed'
+    assert reserve.reserved_by == user
+    assert not models.Hold.objects.exists()
+
+
+def test_hold_confirm_for_past_time(user):
+    """ Временную бронь, время начала которой прошло, нельзя подтвердить """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    now = dt.datetime.now(tz=UTC)
+    hold = models.Hold.objects.create(room=room, held_by=user, start_time=now - dt.timedelta(minutes=1),
+                                      end_time=now + dt.timedelta(hours=1), expires_at=now + dt.timedelta(minutes=5))
+
+    response = api_client.post(reverse('room-hold-confirm', kwargs={'pk': hold.pk}), data={'description': 'late'})
+
+    assert response.status_code == 400
+    assert not models.Reserve.objects.filter(description='late').exists()
+
+
+def test_expired_hold_is_ignored_and_swept(user):
+    """ Истекшая временная бронь не занимает комнату и удаляется командой expire_holds """
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    room = _create_room_with_reserves()
+    request_data = _get_future_reserve_data(room)
+    start_time = dt.datetime.fromisoformat(request_data['start_time'])
+    expired_at = dt.datetime.now(tz=UTC) - dt.timedelta(minutes=1)
+    models.Hold.objects.bulk_create([
+        models.Hold(room=room, held_by=user, start_time=start_time, end_time=start_time + dt.timedelta(hours=1),
+                    expires_at=expired_at) for _ in range(5)])
+
+    response = api_client.post(reverse('room-hold-confirm', kwargs={'pk': models.Hold.objects.first().pk}),
+                               data={'description': 'confirmed'})
+    assert response.status_code == 404
+
+    call_command('expire_holds', batch_size=2, stdout=StringIO())
+    assert not models.Hold.objects.exists()
+
+    response = api_client.post(reverse('room-booking'), data=request_data)
+    assert response.status_code == 201
+
+
 def test_get_404_with_non_existent_room(user):
     """ 404 статус при запросе расписания на несуществующую комнату """
     token = _get_token(user)
@@ -192,6 +399,151 @@ def test_get_report(user, endpoint):
     assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 
 
+def test_get_report_content(user):
+    """ Отчет по комнате открывается python-docx и содержит брони за период """
+    room = _create_room_with_reserves()
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    url = reverse('room-report-retrieve', kwargs={'room_name': room.name})
+    data = {'start_date': '2024-11-5 00:00:00Z', 'end_date': '2024-11-6 00:00:00Z'}
+    response = api_client.get(url, data=data)
+    assert response.status_code == 200
+
+    paragraphs = docx.Document(io.BytesIO(b''.join(response.streaming_content))).paragraphs
+    assert [(paragraph.style.name, paragraph.text) for paragraph in paragraphs] == [
+        ('Title', 'Отчет'),
+        ('Heading 1', room.name),
+        ('Heading 2', 'user'),
+        ('Heading 2', '2024-11-05 11:00:00+00:00'),
+        ('Heading 2', '2024-11-05 12:00:00+00:00'),
+        ('Normal', ''),
+    ]
+
+
+def test_docx_writer_strips_invalid_xml_characters():
+    """ Символы, недопустимые в XML 1.0, удаляются из текста отчета """
+    stream = io.BytesIO()
+    with DocxWriter(stream) as doc:
+        doc.add_heading('a\x01b\ufffec\uffffd\ud800e', level=2)
+        doc.add_paragraph('tab\tand <tag> & text')
+
+    paragraphs = docx.Document(stream).paragraphs
+    assert [paragraph.text for paragraph in paragraphs] == ['abcde', 'tab\tand <tag> & text']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_get_report_zip_bundle(user, settings, workers):
+    """ Отчет по всем комнатам архивом, по файлу на комнату в порядке имен """
+    settings.REPORT_WORKERS = workers
+    _create_room_with_reserves()
+    models.Room.objects.create(name='another_room')
+    token = _get_token(user)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    response = api_client.get(reverse('room-report-list'), data={'bundle': 'zip'})
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/zip'
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ['report_another_room.docx', 'report_room.docx']
+
+
+def test_report_zip_entry_names_are_sanitized():
+    """ Имена комнат с разделителями пути не создают вложенных файлов в архиве """
+    rooms = [('../etc', []), ('a/b', []), ('a_b', []), ('..', [])]
+    with zipfile.ZipFile(io.BytesIO(reports.render_rooms_zip(rooms, 1))) as archive:
+        assert archive.namelist() == ['report___etc.docx', 'report_a_b.docx', 'report_a_b_2.docx', 'report__.docx']
+
+
+def test_report_zip_recovers_broken_pool():
+    """ Сломанный пул процессов заменяется новым, отчет рендерится """
+    rooms = [('first', []), ('second', [])]
+    executor = reports.get_executor(2)
+    executor.submit(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        executor.submit(int).result()
+
+    with zipfile.ZipFile(io.BytesIO(reports.render_rooms_zip(rooms, 2))) as archive:
+        assert archive.namelist() == ['report_first.docx', 'report_second.docx']
+    assert reports.get_executor(2) is not executor
+    assert reports.get_executor(2) is reports.get_executor(2)
+
+
+def test_reserve_admin_changelist(admin_client, django_assert_max_num_queries):
+    """ Список броней в админке не делает N+1 запросов по комнате и пользователю """
+    _create_room_with_reserves()
+    url = reverse('admin:room_booking_reserve_changelist')
+    with django_assert_max_num_queries(10):
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 3
+
+
+def test_reserve_admin_changelist_without_distinct_dates(admin_client):
+    """ Фильтр по периоду не делает SELECT DISTINCT по усеченной дате броней """
+    _create_room_with_reserves()
+    url = reverse('admin:room_booking_reserve_changelist')
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get(url, data={'start_period': '2024-11'})
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 1
+
+    reserve_queries = [query['sql'].lower() for query in context.captured_queries
+                       if 'room_booking_reserve' in query['sql']]
+    assert reserve_queries
+    assert not any('distinct' in sql or 'trunc' in sql for sql in reserve_queries)
+
+
+def test_reserve_admin_capped_count(admin_client, monkeypatch):
+    """ Количество сверх лимита выводится как «N+», «выбрать все» для него не удаляет брони """
+    monkeypatch.setattr(paginators.CappedCountPaginator, 'COUNT_LIMIT', 2)
+    _create_room_with_reserves()
+    url = reverse('admin:room_booking_reserve_changelist')
+
+    response = admin_client.get(url)
+    assert str(response.context['cl'].result_count) == '2+'
+
+    ids = list(models.Reserve.objects.values_list('id', flat=True)[:1])
+    response = admin_client.post(url, {'action': 'cancel_reserves', '_selected_action': ids, 'select_across': '1'})
+    assert response.status_code == 302
+    assert models.Reserve.objects.count() == 3
+
+
+def test_reserve_admin_cancel_action(admin_client):
+    """ Массовая отмена броней из админки """
+    room = _create_room_with_reserves()
+    url = reverse('admin:room_booking_reserve_changelist')
+    ids = list(models.Reserve.objects.filter(room=room).values_list('id', flat=True)[:2])
+    response = admin_client.post(url, {'action': 'cancel_reserves', '_selected_action': ids})
+    assert response.status_code == 302
+    assert models.Reserve.objects.count() == 1
+
+
+def test_get_swagger_schema():
+    """ Схема отдается без авторизации и генерируется один раз на процесс """
+    api_client.credentials()
+    schema.get_schema.cache_clear()
+    response = api_client.get(reverse('schema-json', kwargs={'format': '.json'}))
+    assert response.status_code == 200
+    assert '/room-booking/' in response.json()['paths']
+    assert schema.get_schema.cache_info().currsize == 1
+
+    response = api_client.get(reverse('schema-swagger-ui'))
+    assert response.status_code == 200
+
+
+def test_build_schema_command(tmp_path, settings):
+    """ Команда build_schema сохраняет схему, которая затем отдается из файла """
+    settings.SWAGGER_SCHEMA_DIR = tmp_path
+    call_command('build_schema', stdout=StringIO())
+    assert (tmp_path / 'swagger.json').exists()
+    assert (tmp_path / 'swagger.yaml').exists()
+
+    (tmp_path / 'swagger.json').write_bytes(b'{"paths": {}}')
+    response = api_client.get(reverse('schema-json', kwargs={'format': '.json'}))
+    assert response.json() == {'paths': {}}
+    schema.get_schema.cache_clear()
+
+
 def _get_token(user: User) -> str:
     response = api_client.post('/api/auth/jwt/create/', {
         'username': user.username,
@@ -202,6 +554,12 @@ def _get_token(user: User) -> str:
     return response.data['access']
 
 
+def _get_future_reserve_data(room: models.Room) -> dict:
+    start_time = (dt.datetime.now(tz=UTC) + dt.timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    return {'room': room.name, 'start_time': start_time.isoformat(),
+            'end_time': (start_time + dt.timedelta(hours=1)).isoformat(), 'description': 'idempotent'}
+
+
 def _create_room_with_reserves() -> models.Room:
     user = User.objects.create_user(username='user', password='password')
 
@@ -7,6 +7,9 @@ urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
     path('room-booking/', views.RoomBooking.as_view(), name='room-booking'),
+    path('room-hold/', views.RoomHold.as_view(), name='room-hold'),
+    path('room-hold/<int:pk>/', views.RoomHoldDetail.as_view(), name='room-hold-detail'),
+    path('room-hold/<int:pk>/confirm/', views.RoomHoldConfirm.as_view(), name='room-hold-confirm'),
     path('room/<str:room_name>/schedule/', views.RoomSchedule.as_view(), name='room-schedule'),
     path('room-report/', views.BookingReportList.as_view(), name='room-report-list'),
     path('room-report/<str:room_name>/', views.BookingReportRetieve.as_view(), name='room-report-retrieve')
@@ -1,6 +1,12 @@
 import datetime as dt
+import time
+from typing import Tuple
 
-from rest_framework.exceptions import NotFound
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
 
 from room_booking import models
 
@@ -13,10 +19,67 @@ def get_object_by_name(name: str, key: str) -> models.Room:
     return obj
 
 
-def get_filter_params(request):
-    start_date = request.query_params.get('start_date', str(
-        dt.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)))
-    end_date = request.query_params.get('end_date', str(
-        dt.datetime.now().replace(hour=23, minute=59, second=59, microsecond=0)))
+def parse_filter_date(value: str, name: str) -> dt.datetime:
+    """ Дата из query параметра, приведенная к UTC. Дата без времени - начало суток """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None and (date := parse_date(value)) is not None:
+            parsed = dt.datetime.combine(date, dt.time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: f'Invalid datetime: {value}'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed.astimezone(dt.timezone.utc)
+
+
+def get_filter_params(request) -> Tuple[dt.datetime, dt.datetime]:
+    """ Период фильтрации в UTC. По умолчанию текущие сутки """
+    today = timezone.localdate()
+    start_date = request.query_params.get('start_date')
+    end_date = request.query_params.get('end_date')
+
+    if start_date is None:
+        start_date = timezone.make_aware(dt.datetime.combine(today, dt.time.min)).astimezone(dt.timezone.utc)
+    else:
+        start_date = parse_filter_date(start_date, 'start_date')
+    if end_date is None:
+        end_date = timezone.make_aware(dt.datetime.combine(today, dt.time(23, 59, 59))).astimezone(dt.timezone.utc)
+    else:
+        end_date = parse_filter_date(end_date, 'end_date')
 
     return start_date, end_date
+
+
+def _get_room_schedule_version_key(room_id: int) -> str:
+    return f'room-schedule-version:{room_id}'
+
+
+def _get_room_schedule_version(room_id: int) -> int:
+    # Новая версия начинается с текущего времени в наносекундах, поэтому после вытеснения
+    # ключа из кеша она больше любой прежней и старые записи расписания не используются
+    return cache.get_or_set(_get_room_schedule_version_key(room_id), time.time_ns, None)
+
+
+def get_room_schedule_cache_key(room: models.Room, start_date: dt.datetime, end_date: dt.datetime) -> str:
+    """ Ключ кеша расписания комнаты.
+
+    Включает версию расписания комнаты, которая растет при бронировании, и номер
+    интервала времени: is_free зависит от текущего момента.
+    """
+    version = _get_room_schedule_version(room.pk)
+    bucket = int(time.time() // settings.ROOM_SCHEDULE_CACHE_TIMEOUT)
+    return f'room-schedule:{room.pk}:{version}:{bucket}:{start_date.isoformat()}:{end_date.isoformat()}'
+
+
+def invalidate_room_schedule(*room_ids: int):
+    """ Сброс кеша расписания комнат после изменения их броней """
+    for room_id in room_ids:
+        key = _get_room_schedule_version_key(room_id)
+        cache.add(key, time.time_ns(), None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ключ вытеснен между add и incr
+            cache.add(key, time.time_ns(), None)
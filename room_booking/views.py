@@ -1,20 +1,30 @@
+import datetime as dt
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Prefetch, Q
-from django.http import HttpResponse
-from docx import Document
+from django.http import HttpResponse, StreamingHttpResponse
 
 from django.shortcuts import get_object_or_404
-from drf_yasg.openapi import Parameter, IN_QUERY, FORMAT_DATETIME
+from django.utils import timezone
+from drf_yasg.openapi import Parameter, IN_QUERY, FORMAT_DATETIME, TYPE_STRING
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from room_booking import mixins, models, serializers, utils
+from room_booking import idempotency, mixins, models, reports, serializers, utils
+from room_booking.docx_writer import iter_docx
 
 
 ROOM_MANUAL_PARAMETERS = [
     Parameter('start_date', IN_QUERY, 'Filter by date', type=FORMAT_DATETIME),
     Parameter('end_date', IN_QUERY, 'Filter by date', type=FORMAT_DATETIME)]
 
+REPORT_BUNDLE_PARAMETERS = [
+    Parameter('bundle', IN_QUERY, 'zip - separate report for each room in zip archive', type=TYPE_STRING,
+              enum=['zip'])]
+
 
 class RoomSchedule(mixins.AuthenticationMixin, APIView):
     """ REST API Расписание бронирования комнаты """
@@ -24,24 +34,70 @@ class RoomSchedule(mixins.AuthenticationMixin, APIView):
         room = get_object_or_404(models.Room, name=room_name)
         # По дефолту будет фильтровать бронь за текущую дату
         start_date, end_date = utils.get_filter_params(request)
-        serializer = serializers.RoomSerializer(room, context={'start_date': start_date, 'end_date': end_date})
-        return Response(serializer.data)
+        cache_key = utils.get_room_schedule_cache_key(room, start_date, end_date)
+        data = cache.get(cache_key)
+        if data is None:
+            serializer = serializers.RoomSerializer(room, context={'start_date': start_date, 'end_date': end_date})
+            data = serializer.data
+            cache.set(cache_key, data, settings.ROOM_SCHEDULE_CACHE_TIMEOUT)
+        return Response(data)
 
 
 class RoomBooking(mixins.AuthenticationMixin, APIView):
     """ REST API Бронирование комнаты """
 
     @swagger_auto_schema(request_body=serializers.CreateReserveSerializer,
+                         manual_parameters=idempotency.IDEMPOTENCY_PARAMETERS,
                          responses={201: serializers.CreateReserveSerializer(many=False)})
+    @idempotency.idempotent
     def post(self, request):
         serializer = serializers.CreateReserveSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         request_data = serializer.validated_data
         room = request_data.get('room')
         serializer.save(reserved_by=request.user, room=room)
+        utils.invalidate_room_schedule(room.pk)
+        return Response(serializer.data, status=201)
+
+
+class RoomHold(mixins.AuthenticationMixin, APIView):
+    """ REST API Временная бронь комнаты на время заполнения заявки """
+
+    @swagger_auto_schema(request_body=serializers.CreateHoldSerializer,
+                         responses={201: serializers.CreateHoldSerializer(many=False)})
+    def post(self, request):
+        serializer = serializers.CreateHoldSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        expires_at = timezone.now() + dt.timedelta(seconds=settings.HOLD_TTL)
+        serializer.save(held_by=request.user, expires_at=expires_at)
         return Response(serializer.data, status=201)
 
 
+class RoomHoldDetail(mixins.AuthenticationMixin, APIView):
+    """ REST API Снятие временной брони """
+
+    def delete(self, request, pk):
+        hold = get_object_or_404(models.Hold, pk=pk, held_by=request.user)
+        hold.delete()
+        return Response(status=204)
+
+
+class RoomHoldConfirm(mixins.AuthenticationMixin, APIView):
+    """ REST API Подтверждение временной брони """
+
+    @swagger_auto_schema(request_body=serializers.ConfirmHoldSerializer,
+                         responses={201: serializers.CreateReserveSerializer(many=False)})
+    @transaction.atomic
+    def post(self, request, pk):
+        hold = get_object_or_404(models.Hold.objects.select_for_update(of=('self',)).select_related('room', 'held_by'),
+                                 pk=pk, held_by=request.user, expires_at__gt=timezone.now())
+        serializer = serializers.ConfirmHoldSerializer(data=request.data, context={'hold': hold})
+        serializer.is_valid(raise_exception=True)
+        reserve = serializer.save()
+        transaction.on_commit(lambda: utils.invalidate_room_schedule(reserve.room_id))
+        return Response(serializers.CreateReserveSerializer(reserve).data, status=201)
+
+
 class BookingReportRetieve(mixins.AuthenticationMixin, APIView):
     """ Получение отчета по конкретной комнате """
 
@@ -52,47 +108,45 @@ class BookingReportRetieve(mixins.AuthenticationMixin, APIView):
         reserves = models.Reserve.objects.filter(
             Q(room=room) & Q(start_time__gte=start_date) & Q(end_time__lte=end_date)).select_related(
             'reserved_by').iterator()
-        doc = Document()
-        doc.add_heading('Отчет', 0)
-        doc.add_heading(room_name, level=1)
-
-        for reserve in reserves:
-            doc.add_heading(reserve.reserved_by, level=2)
-            doc.add_heading(reserve.start_time, level=2)
-            doc.add_heading(reserve.end_time, level=2)
-            doc.add_paragraph(reserve.description)
-
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+        # Брони читаются из БД по мере отдачи документа
+        response = StreamingHttpResponse(iter_docx(_iter_room_report(room_name, reserves)),
+                                         content_type=reports.DOCX_CONTENT_TYPE)
         response['Content-Disposition'] = f'attachment; filename="report_{room_name}.docx"'
 
-        doc.save(response)
-
         return response
 
 
 class BookingReportList(mixins.AuthenticationMixin, APIView):
     """ Получение отчета по всем комнатам """
 
-    @swagger_auto_schema(manual_parameters=ROOM_MANUAL_PARAMETERS)
+    @swagger_auto_schema(manual_parameters=ROOM_MANUAL_PARAMETERS + REPORT_BUNDLE_PARAMETERS)
     def get(self, request):
         start_date, end_date = utils.get_filter_params(request)
-        rooms = models.Room.objects.all().prefetch_related(
+        rooms = models.Room.objects.all().order_by('name').prefetch_related(
             Prefetch('room_reserves', queryset=models.Reserve.objects.filter(
                 Q(start_time__gte=start_date) & Q(end_time__lte=end_date)).select_related(
                 'reserved_by')))
-        doc = Document()
-        doc.add_heading('Отчет', 0)
-        for room in rooms:
-            doc.add_heading(room.name, level=1)
+        room_rows = reports.get_room_rows(rooms)
 
-            for reserve in room.room_reserves.all():
-                doc.add_heading(f'reserved_by: {reserve.reserved_by}', level=2)
-                doc.add_heading(f'{reserve.start_time} - {reserve.end_time}', level=2)
-                doc.add_paragraph(f'desciption: {reserve.description}')
+        if request.query_params.get('bundle') == 'zip':
+            # Отчет по каждой комнате отдельным файлом, комнаты рендерятся параллельно
+            response = HttpResponse(reports.render_rooms_zip(room_rows, settings.REPORT_WORKERS),
+                                    content_type=reports.ZIP_CONTENT_TYPE)
+            response['Content-Disposition'] = 'attachment; filename="report.zip"'
+            return response
 
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+        response = StreamingHttpResponse(iter_docx(reports.iter_rooms_report(room_rows)),
+                                         content_type=reports.DOCX_CONTENT_TYPE)
         response['Content-Disposition'] = 'attachment; filename="report.docx"'
 
-        doc.save(response)
-
         return response
+
+
+def _iter_room_report(room_name: str, reserves):
+    yield 0, 'Отчет'
+    yield 1, room_name
+    for reserve in reserves:
+        yield 2, reserve.reserved_by
+        yield 2, reserve.start_time
+        yield 2, reserve.end_time
+        yield None, reserve.description